@@ -13,25 +13,58 @@ http://dx.doi.org/10.1016/j.renene.2012.01.049
 """
 
 import datetime
-import math
 
 import ephem
 import pandas as pd
 import numpy as np
+import pvlib
 
 from gsee import trigon
 
 
-def _solartime(observer, sun):
-    """Return solar time for given observer and sun"""
-    # sidereal time == ra (right ascension) is the highest point (noon)
-    hour_angle = observer.sidereal_time() - sun.ra
-    return ephem.hours(hour_angle + ephem.hours("12:00")).norm  # norm for 24h
+def _maybe_njit(func):
+    """Compile func with numba.njit if numba is available, else return it unchanged"""
+    try:
+        from numba import njit
+    except ImportError:
+        return func
+    return njit(cache=True)(func)
+
+
+@_maybe_njit
+def _brl_kernel(ks, ast, psi, alpha, k_day, a0, a1, b1, b2, b3, b4):
+    """
+    Pure-numeric BRL predictor: returns hourly diffuse fractions from
+    the clearness indices ``ks``, apparent solar times ``ast``,
+    persistence values ``psi``, solar altitude ``alpha`` and daily
+    clearness index ``k_day``, with the six BRL model coefficients
+    passed as scalars.
+
+    """
+    pwr = a0 + a1 * ks + b1 * ast + b2 * alpha + b3 * k_day + b4 * psi
+    # Numerically stable logistic, equivalent to scipy.special.expit(-pwr),
+    # written out so that numba can compile it: exp is only ever taken of
+    # non-positive values, so large |pwr| cannot overflow
+    e = np.exp(-np.abs(pwr))
+    return np.where(pwr >= 0, e / (1.0 + e), 1.0 / (1.0 + e))
 
 
-def _get_psi_func(sunrise, sunset):
+def _solartime_array(times, lon):
     """
-    Return a function, psi(hour, ks), for the given sunrise and
+    Return apparent solar times in radians (noon = pi) for the given
+    tz-aware DatetimeIndex and longitude in radians, using pvlib's
+    vectorized equation of time and hour angle functions.
+
+    """
+    eot = pvlib.solarposition.equation_of_time_spencer71(times.dayofyear)
+    hour_angle = pvlib.solarposition.hour_angle(times, np.degrees(lon), eot)
+    return np.asarray((np.radians(hour_angle) + np.pi) % (2 * np.pi), dtype=float)
+
+
+def _psi_array(ks, sunrise, sunset):
+    """
+    Return an array of hourly persistence values, ``psi``, for the given
+    24-hour array of clearness indices ``ks`` and the given sunrise and
     sunset times
 
     """
@@ -44,34 +77,24 @@ def _get_psi_func(sunrise, sunset):
     except AttributeError:
         sunset_hour = 23
 
-    def f(hour, ks):
-        if (hour > sunrise_hour) and (hour < sunset_hour):
-            psi = (ks[hour - 1] + ks[hour + 1]) / 2
-            # Extra check: in some cases there is no data in `ks` even before
-            # sunset / afer sunrise. For example, if the sun sets just minutes
-            # after the hour, there may be no irradiance data in that hour.
-            # This if-clause ensures that for practical reasons such cases
-            # are treated as if they were sunrise/sunset hours.
-            if np.isnan(psi):
-                if np.isnan(ks[hour - 1]):
-                    psi = ks[hour + 1]
-                else:
-                    psi = ks[hour - 1]
-        elif hour == sunrise_hour:
-            try:
-                psi = ks[hour + 1]
-            except IndexError:
-                psi = ks[hour]
-        elif hour == sunset_hour:
-            try:
-                psi = ks[hour - 1]
-            except IndexError:
-                psi = ks[hour]
-        else:
-            psi = 0
-        return psi
-
-    return f
+    before = np.roll(ks, 1)
+    after = np.roll(ks, -1)
+    psi = (before + after) / 2
+    # Extra check: in some cases there is no data in `ks` even before
+    # sunset / afer sunrise. For example, if the sun sets just minutes
+    # after the hour, there may be no irradiance data in that hour.
+    # These cases are treated as if they were sunrise/sunset hours.
+    psi = np.where(np.isnan(psi), np.where(np.isnan(before), after, before), psi)
+
+    hours = np.arange(len(ks))
+    result = np.where((hours > sunrise_hour) & (hours < sunset_hour), psi, 0)
+    if sunrise_hour + 1 < len(ks):
+        result[sunrise_hour] = ks[sunrise_hour + 1]
+    else:
+        result[sunrise_hour] = ks[sunrise_hour]
+    if sunset_hour != sunrise_hour:
+        result[sunset_hour] = ks[sunset_hour - 1]
+    return result
 
 
 # Updated params from Lauret et al. (2013)
@@ -96,13 +119,15 @@ DEFAULT_PARAMS = {
 
 # TODO make this into a get_daily_diffuse_func with p param,
 # so that can easily switch the predictor parameters!
-def _daily_diffuse(obs, ks, sunrise, sunset, p=DEFAULT_PARAMS):
+def _daily_diffuse(obs, ks, ast, sunrise, sunset, p=DEFAULT_PARAMS):
     """
-    Returns a list of diffuse fractions for the given observer
+    Returns an array of diffuse fractions for the given observer
     which must have its coordinates and date set, and given the ``ks``,
-    a list of 24 hourly clearness indices, and sunrise and sunset times.
+    an array of 24 hourly clearness indices, ``ast``, the matching
+    apparent solar times, and sunrise and sunset times.
 
     """
+    ks = np.asarray(ks, dtype=float)
     date = obs.date.datetime()
     # whether date was set or not, ensure it's at hour 0
     obs.date = datetime.datetime(date.year, date.month, date.day)
@@ -110,28 +135,22 @@ def _daily_diffuse(obs, ks, sunrise, sunset, p=DEFAULT_PARAMS):
     sun.compute(obs)
     # sunrise, sunset = _sunrise_sunset(obs, sun)
     alpha = sun.alt
-    values = []
     k_day = pd.Series(ks).mean()  # using pandas to ignore NaN
-    psi = _get_psi_func(sunrise, sunset)
-    for hour in range(24):
-        if np.isnan(ks[hour]):
-            d = np.nan
-        else:
-            ast = _solartime(obs, sun)
-            pwr = (
-                p["a0"]
-                + p["a1"] * ks[hour]
-                + p["b1"] * ast
-                + p["b2"] * alpha
-                + p["b3"] * k_day
-                + p["b4"] * psi(hour, ks)
-            )
-            d = 1 / (1 + math.e ** pwr)
-        values.append(d)
-        # Increase obs.date by one hour for the next iteration
-        obs.date = obs.date.datetime() + datetime.timedelta(hours=1)
-        sun.compute(obs)
-    return values
+    psi = _psi_array(ks, sunrise, sunset)
+    d = _brl_kernel(
+        ks,
+        ast,
+        psi,
+        float(alpha),
+        float(k_day),
+        p["a0"],
+        p["a1"],
+        p["b1"],
+        p["b2"],
+        p["b3"],
+        p["b4"],
+    )
+    return np.where(np.isnan(ks), np.nan, d)
 
 
 def run(hourly_clearness, coords, rise_set_times=None):
@@ -160,13 +179,24 @@ def run(hourly_clearness, coords, rise_set_times=None):
     obs.lat = str(coords[0])
     obs.lon = str(coords[1])
 
+    # Apparent solar time for the entire series in one vectorized call
+    times = hourly_clearness.index
+    if times.tz is None:
+        times = times.tz_localize("UTC")
+    ast = _solartime_array(times, float(obs.lon))
+
     diffuse_fractions = []
     for i in range(0, len(hourly_clearness), 24):
         # for entry in list in hourly clearness indices:
         ks = hourly_clearness.iloc[i : i + 24].tolist()
+        if np.all(np.isnan(ks)):
+            # No data for this day at all (e.g. missing or masked cells),
+            # so skip the solar position computations
+            diffuse_fractions.extend([np.nan] * len(ks))
+            continue
         obs.date = hourly_clearness.index[i]
         # These are indexed by day, so need to scale the index
         sunrise, sunset = rise_set_times[int(i / 24)]
-        results = _daily_diffuse(obs, ks, sunrise, sunset)
+        results = _daily_diffuse(obs, ks, ast[i : i + 24], sunrise, sunset)
         diffuse_fractions.extend(results)
     return pd.Series(diffuse_fractions, index=hourly_clearness.index)
@@ -1,3 +1,6 @@
+import functools
+
+import pandas as pd
 import pvlib
 
 
@@ -25,6 +28,16 @@ def get_efficiency(irradiance, cell_temperature, module_params):
     return efficiency
 
 
+@functools.lru_cache(maxsize=64)
+def _power_stc(params_key):
+    """
+    Power at STC for the given module params, passed as a frozenset of
+    dict items so results can be cached across relative_eff calls.
+
+    """
+    return 1000 * get_efficiency(1000, 25, dict(params_key))
+
+
 def relative_eff(irradiance, cell_temperature, params):
     """
     Compute relative efficiency of PV module as a function of irradiance
@@ -52,7 +65,22 @@ def relative_eff(irradiance, cell_temperature, params):
     if isinstance(irradiance, float) and irradiance == 0:
         return 0
 
-    power_stc = 1000 * get_efficiency(1000, 25, params)
+    power_stc = _power_stc(frozenset(params.items()))
+
+    if isinstance(irradiance, pd.Series):
+        # Only run the single diode model for hours with nonzero irradiance;
+        # relative efficiency is zero by definition for the rest
+        mask = irradiance > 0
+        irradiance_sub = irradiance[mask]
+        if isinstance(cell_temperature, pd.Series):
+            cell_temperature = cell_temperature[mask]
+        power = irradiance_sub * get_efficiency(
+            irradiance_sub, cell_temperature, params
+        )
+        result = pd.Series(0.0, index=irradiance.index)
+        result[mask] = (power / (power_stc * (irradiance_sub / 1000))).fillna(0)
+        return result
+
     power = irradiance * get_efficiency(irradiance, cell_temperature, params)
 
     # Fill NaNs from any possible divisions by zero with 0
@@ -199,7 +199,7 @@ class HuldPanel(PVPanel):
                 + T_ * (self.k_3 + self.k_4 * np.log(G_) + self.k_5 * (np.log(G_)) ** 2)
                 + self.k_6 * (T_ ** 2)
             )
-        eff.fillna(0, inplace=True)  # NaNs in case that G_ was <= 0
+        eff = eff.fillna(0)  # NaNs in case that G_ was <= 0
         eff[eff < 0] = 0  # Also make sure efficiency can't be negative
         return eff
 
@@ -270,21 +270,26 @@ class Inverter(object):
         """
         Parameters
         ----------
-        df_in : float
+        dc_in : float or pandas Series
             DC electricity input in W
 
         Returns
         -------
-        ac_output : float
+        ac_output : float or pandas Series
             AC electricity output in W
 
         """
-        if dc_in == 0:
+        if np.ndim(dc_in) == 0 and dc_in == 0:
             return 0
-        else:
-            zeta = dc_in / self.dc_capacity
+        zeta = dc_in / self.dc_capacity
+        # Zero input leads to a division by zero here, but is masked
+        # out of the result below
+        with np.errstate(divide="ignore", invalid="ignore"):
             eff = self.efficiency_term * (-0.0162 * zeta - 0.0059 / zeta + 0.9858)
-            return min(self.ac_capacity, dc_in * eff)
+        ac_out = np.where(dc_in == 0, 0.0, np.minimum(self.ac_capacity, dc_in * eff))
+        if isinstance(dc_in, pd.Series):
+            return pd.Series(ac_out, index=dc_in.index)
+        return float(ac_out)
 
 
 def run_model(
@@ -392,7 +397,7 @@ def run_model(
 
     if use_inverter:
         inverter = Inverter(inverter_capacity)
-        ac_out = dc_out.apply(inverter.ac_output).clip(lower=0)
+        ac_out = inverter.ac_output(dc_out).clip(lower=0)
         ac_out_final = ac_out * (1 - system_loss)
     else:
         ac_out_final = dc_out * (1 - system_loss)
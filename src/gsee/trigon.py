@@ -7,6 +7,7 @@ Using trigonometry (Lambert's cosine law, etc).
 """
 
 import datetime
+import functools
 
 import ephem
 import numpy as np
@@ -39,24 +40,35 @@ def _get_rise_and_set_time(date, sun, obs):
     return (rise_time, set_time)
 
 
-def sun_rise_set_times(datetime_index, coords):
+@functools.lru_cache(maxsize=100000)
+def _cached_rise_and_set_time(date, lat, lon):
     """
-    Returns sunrise and set times for the given datetime_index and coords,
-    as a Series indexed by date (days, resampled from the datetime_index).
+    Cached per-day wrapper around ``_get_rise_and_set_time``, keyed on
+    date and the observer's (lat, lon) given as strings. Avoids repeated
+    ephem computations when rise/set times for the same location and days
+    are requested more than once (e.g. in the diffuse fraction and
+    irradiance steps of the same model run).
 
     """
     sun = ephem.Sun()
     obs = ephem.Observer()
-    obs.lat = str(coords[0])
-    obs.lon = str(coords[1])
+    obs.lat = lat
+    obs.lon = lon
+    return _get_rise_and_set_time(date, sun, obs)
+
+
+def sun_rise_set_times(datetime_index, coords):
+    """
+    Returns sunrise and set times for the given datetime_index and coords,
+    as a Series indexed by date (days, resampled from the datetime_index).
 
+    """
     # Ensure datetime_index is daily
-    dtindex = pd.DatetimeIndex(
-        datetime_index.to_series().map(pd.Timestamp.date).unique()
-    )
+    dtindex = datetime_index.normalize().unique()
 
     return pd.Series(
-        [_get_rise_and_set_time(i, sun, obs) for i in dtindex], index=dtindex
+        [_cached_rise_and_set_time(i, str(coords[0]), str(coords[1])) for i in dtindex],
+        index=dtindex,
     )
 
 
@@ -92,6 +104,10 @@ def sun_angles(datetime_index, coords, rise_set_times=None):
     if rise_set_times is None:
         rise_set_times = sun_rise_set_times(datetime_index, coords)
 
+    # rise/set times are indexed by day; a plain dict lookup per hour is
+    # much cheaper than a label-based .loc lookup into the Series
+    rise_set_lookup = dict(zip(rise_set_times.index, rise_set_times.values))
+
     # Calculate hourly altitute, azimuth, and sunshine
     alts = []
     azims = []
@@ -99,8 +115,7 @@ def sun_angles(datetime_index, coords, rise_set_times=None):
 
     for index, item in enumerate(datetime_index):
         obs.date = item
-        # rise/set times are indexed by day, so need to adjust lookup
-        rise_time, set_time = rise_set_times.loc[pd.Timestamp(item.date())]
+        rise_time, set_time = rise_set_lookup[item.normalize()]
 
         # Set angles, sun altitude and duration based on hour of day:
         if rise_time is not None and item.hour == rise_time.hour: